@@ -0,0 +1,295 @@
+# loadtest.py - offline load test: many concurrent students driving the real streamlit_app.py headlessly
+# Requirements: streamlit (>= 1.28, for streamlit.testing.v1.AppTest)
+# Run: python loadtest.py --sessions 200 --processes 4 --store-size 20000
+#      python loadtest.py --scheduler-url http://127.0.0.1:8765 --workdir DIR ...   (scheduler_service.py running in DIR)
+#
+# Each simulated student is one AppTest session: open app -> login -> queue tasks ->
+# Generate & Simpan -> Lihat Jadwal -> Export, every step one rerun of the app. The app
+# runs in a scratch directory with a seeded tasks.json. Reports rerun latency
+# (p50/p95/p99 per step), memory per session and how the task store held up under
+# concurrent writes (overlapping saves, tasks lost).
+#
+# AppTest is not thread-safe (it swaps process-global runtime state), so concurrency comes
+# from worker processes, like several Streamlit workers behind a proxy. Inside a worker all
+# its sessions are open at once and their reruns are interleaved one at a time, which is
+# roughly what the GIL does to CPU-bound reruns in a single Streamlit process anyway.
+
+import argparse, json, math, multiprocessing, os, random, sys, tempfile, time
+from collections import defaultdict
+from datetime import date, timedelta
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(APP_DIR, "streamlit_app.py")
+sys.path.insert(0, APP_DIR)
+
+import scheduler_core
+from scheduler_core import DB, gen_id, load_tasks, minutes_to_hm, save_tasks
+
+STEPS = ["start", "login", "queue", "generate", "lihat_jadwal", "export"]
+JENIS = ["tugas", "ujian", "praktikum", "lainnya"]
+
+# -------------------------
+# Seeding
+# -------------------------
+def seed_store(n_tasks, seed, days=90):
+    """Write n_tasks random scheduled tasks (spread over the next `days` days) to tasks.json in the cwd."""
+    rng = random.Random(seed)
+    nims = list(DB)
+    today = date.today()
+    tasks = []
+    for i in range(n_tasks):
+        start = rng.randrange(8 * 60, 22 * 60, 15)
+        dur = rng.choice([30, 60, 90, 120])
+        tasks.append({
+            "id": gen_id(),
+            "mapel": f"Seed {i}",
+            "jenis": rng.choice(JENIS),
+            "date": (today + timedelta(days=rng.randrange(days))).isoformat(),
+            "start": minutes_to_hm(start),
+            "end": minutes_to_hm(min(start + dur, 23 * 60 + 59)),
+            "duration_minutes": dur,
+            "user_nim": rng.choice(nims),
+            "created_at": (today - timedelta(days=1)).isoformat()
+        })
+    save_tasks(tasks)
+    return len(tasks)
+
+# -------------------------
+# Store monitor
+# -------------------------
+class StoreMonitor:
+    """Wraps scheduler_core.save_tasks to count writes, writes overlapping one in another
+    process (shared counters) and time spent writing."""
+    def __init__(self, in_flight, overlapped):
+        self.in_flight = in_flight      # multiprocessing.Value shared by all workers
+        self.overlapped = overlapped
+        self.writes = 0
+        self.durations = []
+
+    def install(self):
+        original = scheduler_core.save_tasks
+        def save_tasks(tasks):
+            with self.in_flight.get_lock():
+                self.in_flight.value += 1
+                if self.in_flight.value > 1:
+                    with self.overlapped.get_lock():
+                        self.overlapped.value += 1
+            self.writes += 1
+            t0 = time.perf_counter()
+            try:
+                return original(tasks)
+            finally:
+                self.durations.append(time.perf_counter() - t0)
+                with self.in_flight.get_lock():
+                    self.in_flight.value -= 1
+        scheduler_core.save_tasks = save_tasks
+
+# -------------------------
+# Sessions
+# -------------------------
+def share_script_cache():
+    """Make every AppTest use one ScriptCache, as the server does.
+
+    AppTest builds a fresh ScriptCache per run, so every rerun would recompile the app and
+    inflate the measured latency. The shared cache compiles once, under its lock.
+    """
+    try:
+        from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+        from streamlit.testing.v1 import app_test, local_script_runner
+    except ImportError:
+        return False
+    shared = ScriptCache()
+    for mod in (app_test, local_script_runner):
+        if hasattr(mod, "ScriptCache"):
+            mod.ScriptCache = lambda: shared
+    return True
+
+def _by_label(widgets, prefix):
+    return next(w for w in widgets if w.label.startswith(prefix))
+
+def session_steps(nim, queue_len, seed, timeout, timings, out):
+    """One student as a generator that yields after every rerun, so a worker can interleave
+    many open sessions. Sets out["at"] and out["scheduled"]; raises on an app exception."""
+    from streamlit.testing.v1 import AppTest
+    rng = random.Random(seed)
+    at = out["at"] = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    out["scheduled"] = 0
+
+    def rerun(step):
+        t0 = time.perf_counter()
+        at.run()
+        timings[step].append(time.perf_counter() - t0)
+        # Lihat Jadwal shows a missing/broken plotly inline ("Plotly error:", e); that is not a failure
+        if at.exception and not any(m.value.startswith("Plotly error:") for m in at.markdown):
+            raise RuntimeError(f"{step}: {at.exception[0].message}")
+
+    def goto(menu, step):
+        at.sidebar.radio[0].set_value(menu)
+        rerun(step)
+
+    rerun("start"); yield
+    goto("Login", "login"); yield
+    _by_label(at.text_input, "Masukkan NIM").input(nim)
+    _by_label(at.button, "Login").click()
+    rerun("login"); yield
+    goto("Input Kegiatan", "queue"); yield
+    for i in range(queue_len):
+        _by_label(at.text_input, "Nama tugas").input(f"Tugas {nim} {seed}-{i}")
+        _by_label(at.slider, "Prioritas").set_value(rng.randint(1, 4))
+        _by_label(at.slider, "Kesulitan").set_value(rng.randint(1, 4))
+        _by_label(at.text_input, "Deadline").input((date.today() + timedelta(days=rng.randrange(14))).isoformat())
+        _by_label(at.button, "Tambahkan ke queue").click()
+        rerun("queue"); yield
+    goto("Generate Jadwal", "generate"); yield
+    if queue_len:
+        _by_label(at.button, "Generate & Simpan").click()
+        rerun("generate"); yield
+        out["scheduled"] = sum(1 for m in at.success if m.value.startswith("Terjadwal"))
+    goto("Lihat Jadwal", "lihat_jadwal"); yield
+    goto("Export", "export")
+
+def _run_interleaved(sessions):
+    """Advance open sessions round-robin, one rerun each, until all are done; returns errors."""
+    errors = []
+    active = list(sessions)
+    while active:
+        still = []
+        for name, gen in active:
+            try:
+                next(gen)
+                still.append((name, gen))
+            except StopIteration:
+                pass
+            except Exception as e:
+                errors.append(f"{name}: {e}")
+        active = still
+    return errors
+
+def worker(worker_id, session_ids, args, in_flight, overlapped, results):
+    os.chdir(args["workdir"])
+    if args["scheduler_url"]:
+        os.environ["SCHEDULER_URL"] = args["scheduler_url"]
+    monitor = StoreMonitor(in_flight, overlapped)
+    monitor.install()
+    share_script_cache()
+    nims = list(DB)
+
+    # one throwaway session so imports and caches are not counted as per-session memory
+    _run_interleaved([("warm-up", session_steps(nims[0], 0, 0, args["timeout"], defaultdict(list), {}))])
+    rss_before = _rss_kb()
+
+    timings = defaultdict(list)
+    outs = [{} for _ in session_ids]
+    errors = _run_interleaved([
+        (f"session {i}", session_steps(nims[i % len(nims)], args["queue"], args["seed"] * 100003 + i,
+                                       args["timeout"], timings, out))
+        for i, out in zip(session_ids, outs)])
+    rss_after = _rss_kb()  # all of this worker's sessions are still open here
+    results.put({
+        "worker": worker_id, "sessions": len(session_ids), "timings": dict(timings), "errors": errors,
+        "scheduled": sum(o.get("scheduled", 0) for o in outs),
+        "memory_kb": rss_after - rss_before, "writes": monitor.writes, "write_durations": monitor.durations,
+    })
+
+# -------------------------
+# Report
+# -------------------------
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values), max(1, math.ceil(p / 100 * len(values)))) - 1]
+
+def _rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # peak, not current, off Linux
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Concurrent-session load test for streamlit_app.py")
+    ap.add_argument("--sessions", type=int, default=100, help="simulated students, all open at once (default 100)")
+    ap.add_argument("--processes", type=int, default=4, help="worker processes sharing the store (default 4)")
+    ap.add_argument("--store-size", type=int, default=5000, help="tasks seeded into tasks.json (default 5000)")
+    ap.add_argument("--queue", type=int, default=3, help="tasks each student queues and schedules (default 3)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--timeout", type=float, default=60, help="per-rerun timeout in seconds")
+    ap.add_argument("--workdir", help="directory for tasks.json (default: a fresh temp dir)")
+    ap.add_argument("--scheduler-url", help="run the app against scheduler_service.py at this URL")
+    ap.add_argument("--json", help="also write the report as JSON to this path")
+    args = ap.parse_args(argv)
+
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="study-planner-loadtest-")
+    json_path = os.path.abspath(args.json) if args.json else None
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    seeded = seed_store(args.store_size, args.seed)
+
+    ctx = multiprocessing.get_context("spawn")
+    in_flight, overlapped = ctx.Value("i", 0), ctx.Value("i", 0)
+    results = ctx.Queue()
+    wargs = {"workdir": workdir, "scheduler_url": args.scheduler_url, "timeout": args.timeout,
+             "queue": args.queue, "seed": args.seed}
+    n_proc = max(1, min(args.processes, args.sessions))
+    procs = [ctx.Process(target=worker, args=(w, list(range(w, args.sessions, n_proc)), wargs,
+                                               in_flight, overlapped, results))
+             for w in range(n_proc)]
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+    reports = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    wall = time.perf_counter() - t0
+
+    timings = defaultdict(list)
+    for r in reports:
+        for step, ts in r["timings"].items():
+            timings[step].extend(ts)
+    errors = [e for r in reports for e in r["errors"]]
+    scheduled = sum(r["scheduled"] for r in reports)
+    write_durations = [d for r in reports for d in r["write_durations"]]
+    stored = len(load_tasks())
+    all_reruns = [t for step in STEPS for t in timings[step]]
+    report = {
+        "sessions": args.sessions, "processes": n_proc, "store_size": seeded,
+        "queue_per_session": args.queue, "scheduler_url": args.scheduler_url, "workdir": workdir,
+        "wall_seconds": round(wall, 2), "failed_sessions": len(errors), "errors": errors[:10],
+        "latency_ms": {step: {"n": len(ts), "p50": percentile(ts, 50) * 1000, "p95": percentile(ts, 95) * 1000,
+                              "p99": percentile(ts, 99) * 1000}
+                       for step, ts in [("all", all_reruns)] + [(s, timings[s]) for s in STEPS]},
+        "memory_per_session_kb": round(sum(r["memory_kb"] for r in reports) / max(args.sessions, 1), 1),
+        "store": {"writes": sum(r["writes"] for r in reports), "overlapping_writes": overlapped.value,
+                  "write_p95_ms": percentile(write_durations, 95) * 1000,
+                  "tasks_expected": seeded + scheduled, "tasks_stored": stored,
+                  "tasks_lost": seeded + scheduled - stored},
+    }
+
+    print(f"{args.sessions} sessions x {args.queue} tasks in {n_proc} processes, "
+          f"store {seeded} tasks, {wall:.1f}s wall, {len(errors)} failed")
+    print(f"{'step':<14}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for step, lat in report["latency_ms"].items():
+        print(f"{step:<14}{lat['n']:>7}{lat['p50']:>10.1f}{lat['p95']:>10.1f}{lat['p99']:>10.1f}")
+    print(f"memory per session: {report['memory_per_session_kb']:.0f} KB (worker RSS growth / sessions)")
+    store = report["store"]
+    if args.scheduler_url:
+        print("task store: writes handled by the scheduler service")
+    else:
+        print(f"task store: {store['writes']} writes, {store['overlapping_writes']} overlapping another process, "
+              f"p95 write {store['write_p95_ms']:.1f} ms")
+    print(f"tasks: expected {store['tasks_expected']}, stored {store['tasks_stored']}, lost {store['tasks_lost']}")
+    for e in errors[:10]:
+        print("  error:", e)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,760 @@
+# scheduler_core.py - storage, scheduling and id logic shared by streamlit_app.py and scheduler_service.py
+# (no Streamlit imports here, so the scheduling daemon can load it)
+
+import json, os, time, threading, mmap, struct, functools, tempfile
+from bisect import bisect_left
+from datetime import date, datetime as dt, timedelta
+
+# -------------------------
+# Config / files
+# -------------------------
+DATA_FILE = "tasks.json"   # stores tasks list
+USERS_FILE = "users.json"  # optional extra user storage (not necessary)
+# optional binary snapshot of tasks.json (needs numpy), see below; off unless TASKS_SNAPSHOT names a file
+SNAPSHOT_FILE = os.environ.get("TASKS_SNAPSHOT") or None
+
+# default scheduling window (in minutes from midnight)
+DEFAULT_NIGHT_START = 19 * 60
+DEFAULT_NIGHT_END = 22 * 60
+MAX_DAYS_AHEAD_DEFAULT = 60
+
+# create file if missing
+def ensure_files_exist():
+    if not os.path.exists(DATA_FILE):
+        with open(DATA_FILE, "w", encoding="utf-8") as f:
+            json.dump([], f, ensure_ascii=False, indent=2)
+    if not os.path.exists(USERS_FILE):
+        # create users.json from demo DB (optional)
+        with open(USERS_FILE, "w", encoding="utf-8") as f:
+            json.dump([], f)
+
+# -------------------------
+# Demo database (jadwal kuliah)
+# -------------------------
+# optional "jadwal_belajar": study windows per day; without it the night window is used
+def buat_database_mahasiswa():
+    return {
+        "16725186": {
+            "nama": "Jean Fide Tjahjamuljo",
+            "jadwal_kuliah": {
+                "Senin": ["08:00-10:00", "13:00-15:00"],
+                "Selasa": ["10:00-12:00"],
+                "Rabu": ["08:00-10:00", "15:00-17:00"],
+                "Kamis": ["13:00-15:00"],
+                "Jumat": ["10:00-12:00"]
+            }
+        },
+        "16725193": {
+            "nama": "Farel Ahmad",
+            "jadwal_kuliah": {
+                "Senin": ["10:00-12:00"],
+                "Selasa": ["08:00-10:00", "13:00-15:00"],
+                "Rabu": ["10:00-12:00"],
+                "Kamis": ["08:00-10:00", "15:00-17:00"],
+                "Jumat": ["13:00-15:00"]
+            }
+        },
+        "16725305": {
+            "nama": "Nindya Cettakirana Bintoro",
+            "jadwal_kuliah": {
+                "Senin": ["08:00-10:00"],
+                "Selasa": ["10:00-12:00", "15:00-17:00"],
+                "Rabu": ["13:00-15:00"],
+                "Kamis": ["08:00-10:00", "13:00-15:00"],
+                "Jumat": ["10:00-12:00"]
+            },
+            "jadwal_belajar": {
+                "Senin": ["15:00-17:00", "19:00-21:00"],
+                "Selasa": ["19:00-21:00"],
+                "Rabu": ["16:00-18:00", "19:00-22:00"],
+                "Kamis": ["19:00-21:00"],
+                "Jumat": ["14:00-16:00"],
+                "Sabtu": ["09:00-12:00", "19:00-22:00"],
+                "Minggu": ["09:00-12:00"]
+            }
+        }
+    }
+
+DB = buat_database_mahasiswa()
+
+# -------------------------
+# Persistence helpers
+# -------------------------
+def load_tasks():
+    try:
+        with open(DATA_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except:
+        return []
+
+def save_tasks(tasks):
+    # returns (saved list, its data_signature); the list is kept in id (= creation time) order,
+    # new ids sort last, so this is ~O(n)
+    tasks = sorted(tasks, key=task_order_key)
+    with open(DATA_FILE, "w", encoding="utf-8") as f:
+        json.dump(tasks, f, ensure_ascii=False, indent=2, default=str)
+        f.flush()
+        # stat our own handle: re-statting the path could see another worker's newer save
+        src = os.fstat(f.fileno())
+    if SNAPSHOT_FILE:
+        write_snapshot(tasks, src)
+    return tasks, data_signature(src)
+
+# -------------------------
+# Binary snapshot (optional, needs numpy)
+# -------------------------
+# With TASKS_SNAPSHOT=tasks.snap it is rewritten on every save (roughly doubling the save
+# cost), and the auto-timer payload is read from it instead of parsing tasks.json. Layout:
+#   header | task records (fixed width, sorted by date,start) | string table
+# Readers mmap it and reads the records through NumPy views; id/mapel strings are
+# only decoded for the rows actually used. The header stores tasks.json's mtime/size, so
+# a stale snapshot (json edited by hand) is ignored and callers fall back to load_tasks().
+SNAPSHOT_MAGIC = b"TSNP"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct("<4sIIIQQ")  # magic, version, n_tasks, strings_size, src mtime_ns, src size
+SNAPSHOT_TASK_FIELDS = [("date", "<i4"), ("start", "<u2"), ("end", "<u2"),
+                        ("id_off", "<u4"), ("id_len", "<u2"), ("mapel_off", "<u4"), ("mapel_len", "<u2")]
+
+def write_snapshot(tasks, src, path=None):
+    """Write the snapshot for `tasks`; `src` is the os.stat_result of the tasks.json they were saved to."""
+    path = path or SNAPSHOT_FILE
+    if not path:
+        return False
+    try:
+        import numpy as np
+    except ImportError:
+        return False
+    try:
+        strings = bytearray()
+        def add_str(value):
+            b = str(value or "").encode("utf-8")[:0xFFFF]
+            off = len(strings)
+            strings.extend(b)
+            return off, len(b)
+        rows = []
+        for t in tasks:
+            try:
+                d = parse_iso_date(t.get("date"))
+                start, end = hm_to_minutes(t["start"]), hm_to_minutes(t["end"])
+            except:
+                continue
+            if d is None:
+                continue
+            rows.append((d.toordinal(), start, end) + add_str(t.get("id")) + add_str(t.get("mapel")))
+        recs = np.array(rows, dtype=SNAPSHOT_TASK_FIELDS)
+        recs.sort(order=["date", "start"])
+        header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(recs), len(strings),
+                                      src.st_mtime_ns, src.st_size)
+        # unique temp file, so workers saving at the same time never share one
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                   dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(header)
+                f.write(recs.tobytes())
+                f.write(strings)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        return True
+    except Exception:
+        # the snapshot is only an accelerator; tasks.json is already saved
+        return False
+
+class TaskSnapshot:
+    def __init__(self, path):
+        import numpy as np
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_tasks, n_strings, self.src_mtime_ns, self.src_size = SNAPSHOT_HEADER.unpack_from(self._mm, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"{path}: not a task snapshot (v{SNAPSHOT_VERSION})")
+        task_dtype = np.dtype(SNAPSHOT_TASK_FIELDS)
+        self._strings_off = SNAPSHOT_HEADER.size + n_tasks * task_dtype.itemsize
+        if self._strings_off + n_strings > len(self._mm):
+            raise ValueError(f"{path}: truncated snapshot")
+        self.records = np.frombuffer(self._mm, dtype=task_dtype, count=n_tasks, offset=SNAPSHOT_HEADER.size)
+        self._np = np
+
+    def __len__(self):
+        return len(self.records)
+
+    def string(self, off, length):
+        start = self._strings_off + int(off)
+        return self._mm[start:start + int(length)].decode("utf-8", "ignore")
+
+    def date_slice(self, first, last):
+        """Index range of records with first <= date <= last (records are sorted by date)."""
+        dates = self.records["date"]
+        lo = int(self._np.searchsorted(dates, first.toordinal(), side="left"))
+        hi = int(self._np.searchsorted(dates, last.toordinal(), side="right"))
+        return lo, hi
+
+@functools.lru_cache(maxsize=1)
+def _open_snapshot(path, mtime_ns, size):
+    return TaskSnapshot(path)
+
+def load_snapshot():
+    """Snapshot matching the current tasks.json, or None (disabled / no numpy / missing / stale)."""
+    if not SNAPSHOT_FILE:
+        return None
+    try:
+        src = os.stat(DATA_FILE)
+        snap_stat = os.stat(SNAPSHOT_FILE)
+        snap = _open_snapshot(SNAPSHOT_FILE, snap_stat.st_mtime_ns, snap_stat.st_size)
+    except Exception:
+        return None
+    if (snap.src_mtime_ns, snap.src_size) != (src.st_mtime_ns, src.st_size):
+        return None
+    return snap
+
+# -------------------------
+# Time helpers
+# -------------------------
+def hm_to_minutes(hm):
+    h, m = map(int, hm.split(":"))
+    return h*60 + m
+
+def minutes_to_hm(minutes):
+    h = minutes // 60
+    m = minutes % 60
+    return f"{h:02d}:{m:02d}"
+
+def parse_iso_date(s):
+    try:
+        return dt.strptime(s, "%Y-%m-%d").date()
+    except:
+        return None
+
+# -------------------------
+# Scheduling logic
+# -------------------------
+WEEKDAY_MAP = {"Senin":0,"Selasa":1,"Rabu":2,"Kamis":3,"Jumat":4,"Sabtu":5,"Minggu":6}
+IDX_TO_DAY = {v:k for k,v in WEEKDAY_MAP.items()}
+
+def convert_weekday_to_date(weekday, week_number, month, year):
+    weekday = weekday.capitalize()
+    if weekday not in WEEKDAY_MAP:
+        return None
+    target = WEEKDAY_MAP[weekday]
+    try:
+        d = date(year, month, 1)
+    except:
+        return None
+    count = 0
+    while d.month == month:
+        if d.weekday() == target:
+            count += 1
+            if count == week_number:
+                return d
+        d += timedelta(days=1)
+    return None
+
+def merge_intervals(intervals):
+    if not intervals:
+        return []
+    intervals = sorted(intervals, key=lambda x: x[0])
+    merged = [list(intervals[0])]
+    for s,e in intervals[1:]:
+        if s <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s,e])
+    return merged
+
+def get_class_occupied_for_date(nim, target_date, roster=None):
+    if roster is not None:
+        return [list(iv) for iv in roster.get(nim, {}).get(target_date.weekday(), [])]
+    occ = []
+    if not nim or nim not in DB:
+        return occ
+    jadwal = DB[nim].get("jadwal_kuliah", {})
+    hari = IDX_TO_DAY[target_date.weekday()]
+    for times in jadwal.get(hari, []):
+        try:
+            s,e = times.split("-")
+            occ.append([hm_to_minutes(s), hm_to_minutes(e)])
+        except:
+            continue
+    return occ
+
+def get_tasks_occupied_for_date(all_tasks, target_date, ignore_task_id=None, day_index=None):
+    if day_index is not None:
+        return [[s, e] for s, e, tid, _ in day_index.get(target_date, ()) if not (ignore_task_id and tid == ignore_task_id)]
+    occ = []
+    for t in all_tasks:
+        if ignore_task_id and t.get("id") == ignore_task_id:
+            continue
+        try:
+            if parse_iso_date(t.get("date")) == target_date:
+                occ.append([hm_to_minutes(t["start"]), hm_to_minutes(t["end"])])
+        except:
+            continue
+    return occ
+
+def get_study_windows_for_date(nim, target_date, night_start=DEFAULT_NIGHT_START, night_end=DEFAULT_NIGHT_END):
+    """Availability windows for a day: the user's jadwal_belajar if they have one, else [night_start, night_end]."""
+    jadwal = DB.get(nim, {}).get("jadwal_belajar") if nim else None
+    if jadwal is None:
+        return [[night_start, night_end]]
+    windows = []
+    for times in jadwal.get(IDX_TO_DAY[target_date.weekday()], []):
+        try:
+            s,e = times.split("-")
+            windows.append([hm_to_minutes(s), hm_to_minutes(e)])
+        except:
+            continue
+    return merge_intervals(windows)
+
+def subtract_intervals(windows, occupied):
+    """Parts of the (sorted, disjoint) windows not covered by the merged occupied intervals."""
+    gaps = []
+    for ws, we in windows:
+        cur = ws
+        for os_, oe in occupied:
+            if oe <= cur or os_ >= we:
+                continue
+            if os_ > cur:
+                gaps.append([cur, os_])
+            cur = max(cur, oe)
+        if cur < we:
+            gaps.append([cur, we])
+    return gaps
+
+# -------------------------
+# Gap allocator
+# -------------------------
+# Free gaps (availability windows minus tasks and classes) for one user over a range of
+# days. A max segment tree over the days holds each day's longest gap, so "earliest day
+# with a gap >= n minutes" is one O(log days) descent instead of rescanning every day;
+# the per-day gap lists are short and kept sorted by start.
+#   strategy "first": earliest gap on that day (same placement as the old scheduler)
+#   strategy "best":  tightest gap on that day, leaving the larger gaps for longer tasks
+class GapAllocator:
+    def __init__(self, nim, first_day, num_days, day_index, roster=None, ignore_task_id=None,
+                 night_start=DEFAULT_NIGHT_START, night_end=DEFAULT_NIGHT_END):
+        self.first_day = first_day
+        self.num_days = num_days
+        self.gaps = []
+        for off in range(num_days):
+            d = first_day + timedelta(days=off)
+            occ = (get_tasks_occupied_for_date(None, d, ignore_task_id=ignore_task_id, day_index=day_index)
+                   + get_class_occupied_for_date(nim, d, roster=roster))
+            self.gaps.append(subtract_intervals(get_study_windows_for_date(nim, d, night_start, night_end),
+                                                merge_intervals(occ)))
+        size = 1
+        while size < num_days:
+            size *= 2
+        self._size = size
+        self._tree = [0] * (2 * size)
+        for off, gaps in enumerate(self.gaps):
+            self._tree[size + off] = max((e - s for s, e in gaps), default=0)
+        for i in range(size - 1, 0, -1):
+            self._tree[i] = max(self._tree[2*i], self._tree[2*i + 1])
+
+    def _set_day(self, off, gaps):
+        self.gaps[off] = gaps
+        i = self._size + off
+        self._tree[i] = max((e - s for s, e in gaps), default=0)
+        i //= 2
+        while i:
+            self._tree[i] = max(self._tree[2*i], self._tree[2*i + 1])
+            i //= 2
+
+    def _first_day(self, need, lo, hi, node=1, node_lo=0, node_hi=None):
+        # leftmost day offset in [lo, hi) whose longest gap is >= need
+        if node_hi is None:
+            node_hi = self._size
+        if node_hi <= lo or node_lo >= hi or self._tree[node] < need:
+            return None
+        if node_hi - node_lo == 1:
+            return node_lo
+        mid = (node_lo + node_hi) // 2
+        found = self._first_day(need, lo, hi, 2*node, node_lo, mid)
+        if found is None:
+            found = self._first_day(need, lo, hi, 2*node + 1, mid, node_hi)
+        return found
+
+    def _pick_gap(self, off, need, strategy):
+        fitting = [g for g in self.gaps[off] if g[1] - g[0] >= need]
+        if strategy == "best":
+            return min(fitting, key=lambda g: (g[1] - g[0], g[0]))
+        return fitting[0]
+
+    def reserve(self, d, start, end):
+        """Mark [start, end) on date d as taken (e.g. a slot handed out by another allocator)."""
+        off = (d - self.first_day).days
+        if 0 <= off < self.num_days:
+            self._set_day(off, subtract_intervals(self.gaps[off], [[start, end]]))
+
+    def release(self, d, start, end):
+        off = (d - self.first_day).days
+        if 0 <= off < self.num_days:
+            self._set_day(off, merge_intervals(self.gaps[off] + [[start, end]]))
+
+    def allocate(self, requested_date, duration_minutes, max_days=MAX_DAYS_AHEAD_DEFAULT, min_chunk=0, strategy="first"):
+        """Reserve a slot on/after requested_date (within max_days) and return [(date, start_min, end_min), ...].
+
+        Tries one contiguous block first; if there is none and min_chunk > 0, splits the task into
+        chronological chunks of at least min_chunk minutes. Returns None (nothing reserved) if it does not fit.
+        """
+        lo = max((requested_date - self.first_day).days, 0)
+        hi = min(lo + max_days, self.num_days)
+        off = self._first_day(duration_minutes, lo, hi)
+        if off is not None:
+            s, _ = self._pick_gap(off, duration_minutes, strategy)
+            d = self.first_day + timedelta(days=off)
+            self.reserve(d, s, s + duration_minutes)
+            return [(d, s, s + duration_minutes)]
+        if not min_chunk or min_chunk >= duration_minutes:
+            return None
+        parts = []
+        remaining = duration_minutes
+        while remaining > 0:
+            # the rest must stay splittable into chunks >= min_chunk
+            need = remaining if remaining < 2 * min_chunk else min_chunk
+            off = self._first_day(need, lo, hi)
+            if off is None:
+                for part in parts:
+                    self.release(*part)
+                return None
+            s, e = self._pick_gap(off, need, strategy)
+            take = min(e - s, remaining)
+            if 0 < remaining - take < min_chunk:
+                take = remaining - min_chunk
+            d = self.first_day + timedelta(days=off)
+            self.reserve(d, s, s + take)
+            parts.append((d, s, s + take))
+            remaining -= take
+            lo = off
+        # best-fit may pick an earlier gap on the same day than the previous chunk
+        parts.sort()
+        return parts
+
+def find_slot_for_task(all_tasks, nim, requested_date, duration_minutes, ignore_task_id=None,
+                       night_start=DEFAULT_NIGHT_START, night_end=DEFAULT_NIGHT_END, max_days=MAX_DAYS_AHEAD_DEFAULT,
+                       day_index=None, roster=None):
+    # day_index/roster (from the warm-up) replace the per-day scan of all_tasks and DB
+    if day_index is None:
+        day_index = build_day_index(all_tasks)
+    alloc = GapAllocator(nim, requested_date, max_days, day_index, roster=roster, ignore_task_id=ignore_task_id,
+                         night_start=night_start, night_end=night_end)
+    slots = alloc.allocate(requested_date, duration_minutes, max_days)
+    if not slots:
+        return None
+    d, s, e = slots[0]
+    return (d, minutes_to_hm(s), minutes_to_hm(e))
+
+# -------------------------
+# Priority & duration
+# -------------------------
+def hitung_waktu_belajar(kesulitan):
+    if kesulitan == 1: return 30
+    if kesulitan == 2: return 60
+    if kesulitan == 3: return 90
+    return 120
+
+def hitung_bobot_prioritas(prioritas, kesulitan):
+    return prioritas + kesulitan
+
+# -------------------------
+# ID gen
+# -------------------------
+# IDs are ULID-style: 48-bit ms timestamp + 80-bit random part, Crockford base32 (26 chars).
+# They sort by creation time, so appending new tasks keeps tasks.json in order and
+# created-at ranges can be found with bisect instead of a separate index (schedule_batch
+# stamps created_at from the id, i.e. queue time; split parts get fresh ids).
+# Old 8-char IDs (uuid4 prefix) stay valid; they are ordered by their created_at.
+ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ULID_LEN = 26
+ULID_TIME_LEN = 10
+
+def _b32_encode(value, length):
+    chars = []
+    for _ in range(length):
+        chars.append(ULID_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+def _b32_decode(s):
+    value = 0
+    for c in s:
+        value = value * 32 + ULID_ALPHABET.index(c)
+    return value
+
+# module state, so ids stay monotonic across all sessions/reruns of the process
+_id_state = {"lock": threading.Lock(), "ms": 0, "rand": 0}
+
+def gen_id():
+    state = _id_state
+    now_ms = int(time.time() * 1000)
+    with state["lock"]:
+        if now_ms <= state["ms"]:
+            # same millisecond (or clock moved back): bump the random part
+            now_ms = state["ms"]
+            rand = state["rand"] + 1
+            if rand >> 80:
+                now_ms += 1
+                rand = int.from_bytes(os.urandom(10), "big")
+        else:
+            rand = int.from_bytes(os.urandom(10), "big")
+        state["ms"], state["rand"] = now_ms, rand
+    return _b32_encode(now_ms, ULID_TIME_LEN) + _b32_encode(rand, ULID_LEN - ULID_TIME_LEN)
+
+def is_ulid(task_id):
+    return isinstance(task_id, str) and len(task_id) == ULID_LEN and all(c in ULID_ALPHABET for c in task_id)
+
+def id_timestamp(task_id):
+    """Creation time encoded in a ULID-style id, or None for old 8-char ids."""
+    if not is_ulid(task_id):
+        return None
+    return dt.fromtimestamp(_b32_decode(task_id[:ULID_TIME_LEN]) / 1000)
+
+def _time_prefix(when):
+    return _b32_encode(max(int(when.timestamp() * 1000), 0), ULID_TIME_LEN)
+
+def task_order_key(t):
+    """Time-ordered sort key for a task, for both new and old ids."""
+    tid = str(t.get("id") or "")
+    if is_ulid(tid):
+        return tid
+    try:
+        prefix = _time_prefix(dt.fromisoformat(t.get("created_at")))
+    except:
+        prefix = "0" * ULID_TIME_LEN
+    return prefix + tid.upper()
+
+def tasks_created_between(tasks, start, end):
+    """Tasks created in [start, end). `tasks` must be in task_order_key order (save_tasks keeps it so)."""
+    lo = bisect_left(tasks, _time_prefix(start), key=task_order_key)
+    hi = bisect_left(tasks, _time_prefix(end), key=task_order_key)
+    return tasks[lo:hi]
+
+# -------------------------
+# Auto-timer payload
+# -------------------------
+def _build_tasks_for_js(all_tasks, lookahead_days=7):
+    """Return list of task dicts with start/end in ms since epoch for next lookahead_days."""
+    out = []
+    now = dt.now()
+    end_limit = now + timedelta(days=lookahead_days)
+    for t in all_tasks:
+        try:
+            d = parse_iso_date(t.get("date"))
+            if d is None:
+                continue
+            # Only consider tasks within lookahead window
+            if not (now.date() <= d <= end_limit.date()):
+                continue
+            start_hm = t.get("start")
+            end_hm = t.get("end")
+            if not start_hm or not end_hm:
+                continue
+            start_dt = dt.combine(d, dt.strptime(start_hm, "%H:%M").time())
+            end_dt = dt.combine(d, dt.strptime(end_hm, "%H:%M").time())
+            # convert to milliseconds (JS-friendly)
+            out.append({
+                "id": t.get("id"),
+                "mapel": t.get("mapel"),
+                "start_ms": int(start_dt.timestamp() * 1000),
+                "end_ms": int(end_dt.timestamp() * 1000)
+            })
+        except Exception:
+            continue
+    return out
+
+def _build_tasks_for_js_from_snapshot(snap, lookahead_days=7):
+    """Same payload as _build_tasks_for_js, read from the mmapped snapshot (only the window is decoded)."""
+    out = []
+    now = dt.now()
+    lo, hi = snap.date_slice(now.date(), (now + timedelta(days=lookahead_days)).date())
+    for r in snap.records[lo:hi]:
+        day_start = dt.combine(date.fromordinal(int(r["date"])), dt.min.time())
+        out.append({
+            "id": snap.string(r["id_off"], r["id_len"]),
+            "mapel": snap.string(r["mapel_off"], r["mapel_len"]),
+            "start_ms": int((day_start + timedelta(minutes=int(r["start"]))).timestamp() * 1000),
+            "end_ms": int((day_start + timedelta(minutes=int(r["end"]))).timestamp() * 1000)
+        })
+    return out
+
+# -------------------------
+# Warm index
+# -------------------------
+# Everything the pages need pre-parsed: tasks bucketed per day, class rosters per weekday
+# and the auto-timer payload. Built in the background by the app (see warm_index() in
+# streamlit_app.py) or held by scheduler_service.py; only valid while `sig` matches
+# data_signature().
+WARM_LOOKAHEAD_DAYS = 14
+
+class WarmIndex:
+    def __init__(self, sig, tasks, day_index, roster, timer_payload):
+        self.sig = sig
+        self.tasks = tasks                  # parsed tasks.json (treat as read-only)
+        self.day_index = day_index          # date -> [(start_min, end_min, task_id, user_nim)]
+        self.roster = roster                # nim -> weekday -> [[start_min, end_min]]
+        self.timer_payload = timer_payload  # _build_tasks_for_js(tasks, WARM_LOOKAHEAD_DAYS)
+
+def data_signature(st=None):
+    # st: a stat of tasks.json already taken (save_tasks passes the fstat of its own handle)
+    if st is None:
+        try:
+            st = os.stat(DATA_FILE)
+        except OSError:
+            return None
+    return (st.st_mtime_ns, st.st_size, date.today())
+
+def build_day_index(tasks):
+    index = {}
+    for t in tasks:
+        try:
+            d = parse_iso_date(t.get("date"))
+            if d is None:
+                continue
+            index.setdefault(d, []).append((hm_to_minutes(t["start"]), hm_to_minutes(t["end"]), t.get("id"), t.get("user_nim")))
+        except:
+            continue
+    return index
+
+def compile_roster(db):
+    roster = {}
+    for nim, info in db.items():
+        by_day = roster.setdefault(nim, {})
+        for hari, times in info.get("jadwal_kuliah", {}).items():
+            if hari not in WEEKDAY_MAP:
+                continue
+            for t in times:
+                try:
+                    s, e = t.split("-")
+                    by_day.setdefault(WEEKDAY_MAP[hari], []).append([hm_to_minutes(s), hm_to_minutes(e)])
+                except:
+                    continue
+    return roster
+
+def build_warm_index(tasks, sig):
+    return WarmIndex(sig, tasks, build_day_index(tasks), compile_roster(DB),
+                     _build_tasks_for_js(tasks, lookahead_days=WARM_LOOKAHEAD_DAYS))
+
+# -------------------------
+# Scheduler operations
+# -------------------------
+# The page-level operations on the task store. LocalScheduler runs them in-process
+# (single node); scheduler_service.SchedulerClient exposes the same methods backed by
+# the shared daemon, so the pages do not care which one they get.
+class LocalScheduler:
+    def __init__(self, warm=None):
+        self.warm = warm     # WarmIndex matching tasks.json, or None for the slow path
+        self.saved = None    # task list written by the last write operation
+        self.saved_sig = None  # and its data_signature
+
+    def _save(self, tasks):
+        self.saved, self.saved_sig = save_tasks(tasks)
+        self.warm = None     # describes the data before this write; read tasks.json from now on
+
+    def tasks(self):
+        """All stored tasks (read-only; do not mutate the dicts)."""
+        if self.warm is not None:
+            return list(self.warm.tasks)
+        return load_tasks()
+
+    def timer_payload(self, lookahead_days=WARM_LOOKAHEAD_DAYS):
+        if self.warm is not None and lookahead_days == WARM_LOOKAHEAD_DAYS:
+            return self.warm.timer_payload
+        snap = load_snapshot()
+        if snap is not None:
+            try:
+                return _build_tasks_for_js_from_snapshot(snap, lookahead_days)
+            except Exception:
+                pass  # corrupted record (e.g. a date out of range) -> rebuild from the JSON
+        return _build_tasks_for_js(load_tasks(), lookahead_days)
+
+    def schedule_batch(self, items, default_nim=None, night_start=DEFAULT_NIGHT_START,
+                       night_end=DEFAULT_NIGHT_END, max_days=MAX_DAYS_AHEAD_DEFAULT, min_chunk=0, strategy="first"):
+        """Schedule queue items in the given order and save.
+
+        Returns, per item, the list of new tasks: one task, several parts when it was split
+        (min_chunk > 0, see GapAllocator.allocate), or [] if no slot was found.
+        """
+        tasks = self.tasks()
+        day_index = self.warm.day_index if self.warm is not None else build_day_index(tasks)
+        roster = self.warm.roster if self.warm is not None else None
+        # one allocator per user over all the days their items may land on
+        nims = [it.get("user_nim") or default_nim or None for it in items]
+        reqs = [parse_iso_date(it["requested_date"]) for it in items]
+        spans = {}
+        for nim, req in zip(nims, reqs):
+            first, last = spans.get(nim, (req, req))
+            spans[nim] = (min(first, req), max(last, req))
+        allocators = {nim: GapAllocator(nim, first, (last - first).days + max_days, day_index, roster=roster,
+                                        night_start=night_start, night_end=night_end)
+                      for nim, (first, last) in spans.items()}
+        results = []
+        for it, nim_for_check, req in zip(items, nims, reqs):
+            alloc = allocators[nim_for_check]
+            slots = alloc.allocate(req, it["duration_minutes"], max_days, min_chunk=min_chunk, strategy=strategy)
+            if not slots:
+                results.append([])
+                continue
+            for other in allocators.values():
+                if other is not alloc:
+                    for d, start, end in slots:
+                        other.reserve(d, start, end)
+            parts = []
+            for k, (d, start, end) in enumerate(slots, 1):
+                tid = it["id"] if len(slots) == 1 else gen_id()
+                newtask = {
+                    "id": tid,
+                    "mapel": it["mapel"],
+                    "jenis": it["jenis"],
+                    "date": d.isoformat(),
+                    "start": minutes_to_hm(start),
+                    "end": minutes_to_hm(end),
+                    "duration_minutes": end - start,
+                    "user_nim": nim_for_check,
+                    # the id's own time (when the item was queued), so created_at and id order agree
+                    "created_at": (id_timestamp(tid) or dt.now()).isoformat()
+                }
+                if len(slots) > 1:
+                    newtask.update(split_of=it["id"], part=k, parts=len(slots))
+                parts.append(newtask)
+            tasks.extend(parts)
+            results.append(parts)
+        self._save(tasks)
+        return results
+
+    def delete_task(self, task_id):
+        """Delete a task by id (a split task's queue id deletes all its parts); returns the number removed."""
+        tasks = self.tasks()
+        new_tasks = [t for t in tasks if t.get("id") != task_id and t.get("split_of") != task_id]
+        self._save(new_tasks)
+        return len(tasks) - len(new_tasks)
+
+    def reassign_task(self, task_id, new_date, default_nim=None):
+        """Move a task to the first free slot from new_date (date or ISO string) and save.
+
+        Returns the updated task, or None if no slot was found. Raises KeyError for an unknown id.
+        """
+        if isinstance(new_date, str):
+            new_date = parse_iso_date(new_date)
+        tasks = self.tasks()
+        found = next((t for t in tasks if t.get("id") == task_id), None)
+        if found is None:
+            raise KeyError(task_id)
+        tasks_without_old = [t for t in tasks if t.get("id") != task_id]
+        dur = found.get("duration_minutes", 60)
+        nim_for_check = found.get("user_nim") or default_nim or None
+        if self.warm is not None:
+            slot = find_slot_for_task(tasks_without_old, nim_for_check, new_date, dur, ignore_task_id=task_id,
+                                      day_index=self.warm.day_index, roster=self.warm.roster)
+        else:
+            slot = find_slot_for_task(tasks_without_old, nim_for_check, new_date, dur, ignore_task_id=None)
+        if not slot:
+            return None
+        assigned_date, start, end = slot
+        updated = dict(found, date=assigned_date.isoformat(), start=start, end=end)
+        self._save(tasks_without_old + [updated])
+        return updated
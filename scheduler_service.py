@@ -0,0 +1,202 @@
+# scheduler_service.py - optional local scheduling daemon shared by several Streamlit processes
+# Run:  python scheduler_service.py --port 8765
+# Then: SCHEDULER_URL=http://127.0.0.1:8765 streamlit run streamlit_app.py   (in every worker)
+#
+# The daemon owns tasks.json, its warm index and the scheduling engine (scheduler_core),
+# so the index is built once and writes from one worker are seen by all others at once.
+# Protocol: POST /rpc {"calls": [{"method": ..., "params": {...}}, ...]}
+#        -> {"results": [{"result": ...} | {"error": ...}, ...]}   (GET /health for a ping)
+
+import argparse, json, threading, queue
+import http.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from scheduler_core import (DEFAULT_NIGHT_END, DEFAULT_NIGHT_START, MAX_DAYS_AHEAD_DEFAULT, WARM_LOOKAHEAD_DAYS,
+                            LocalScheduler, build_warm_index, data_signature, ensure_files_exist, load_tasks)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+READ_METHODS = {"tasks", "timer_payload"}
+WRITE_METHODS = {"schedule_batch", "delete_task", "reassign_task"}
+
+# -------------------------
+# Server
+# -------------------------
+class SchedulerStore:
+    """In-memory index of tasks.json. Writes are serialised; after each one the index is rebuilt
+    from the saved list (O(n), but without re-reading tasks.json)."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = None
+
+    def _current_locked(self):
+        # reload if tasks.json changed behind our back (hand edit, a worker without SCHEDULER_URL)
+        sig = data_signature()
+        if self.current is None or self.current.sig != sig:
+            self.current = build_warm_index(load_tasks(), sig)
+        return self.current
+
+    def index(self):
+        current = self.current
+        if current is not None and current.sig == data_signature():
+            return current
+        with self.lock:
+            return self._current_locked()
+
+    def call(self, method, params):
+        if method in READ_METHODS:
+            return getattr(LocalScheduler(self.index()), method)(**params)
+        if method not in WRITE_METHODS:
+            raise ValueError(f"unknown method: {method}")
+        with self.lock:
+            sched = LocalScheduler(self._current_locked())
+            result = getattr(sched, method)(**params)
+            if sched.saved is not None:
+                # signature of the file this write produced, not a fresh stat (another process may have saved since)
+                self.current = build_warm_index(sched.saved, sched.saved_sig)
+            return result
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can pool connections
+    store = None
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._reply(404, {"error": "not found"})
+        self._reply(200, {"ok": True, "tasks": len(self.store.index().tasks)})
+
+    def do_POST(self):
+        if self.path != "/rpc":
+            return self._reply(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            calls = json.loads(self.rfile.read(length) or b"{}").get("calls", [])
+        except Exception as e:
+            return self._reply(400, {"error": f"bad request: {e}"})
+        results = []
+        for c in calls:
+            try:
+                results.append({"result": self.store.call(c["method"], c.get("params") or {})})
+            except Exception as e:
+                results.append({"error": f"{type(e).__name__}: {e}"})
+        self._reply(200, {"results": results})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    ensure_files_exist()
+    store = SchedulerStore()
+    store.index()  # build the index before accepting requests
+    handler = type("Handler", (_Handler,), {"store": store})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    print(f"scheduler service on http://{host}:{port} ({len(store.current.tasks)} tasks)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+# -------------------------
+# Client
+# -------------------------
+class SchedulerServiceError(RuntimeError):
+    pass
+
+
+class SchedulerClient:
+    """Same methods as scheduler_core.LocalScheduler, backed by the daemon. Thread-safe, pools connections."""
+    def __init__(self, url, timeout=30, pool_size=8):
+        parts = urlsplit(url)
+        self.host = parts.hostname or DEFAULT_HOST
+        self.port = parts.port or DEFAULT_PORT
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _post(self, conn, body):
+        conn.request("POST", "/rpc", body=body, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        data = resp.read()
+        if resp.status != 200:
+            raise SchedulerServiceError(f"scheduler service: HTTP {resp.status} {data[:200]!r}")
+        return json.loads(data)
+
+    def batch(self, calls):
+        """Run several (method, params) calls in one round-trip; returns their results in order."""
+        body = json.dumps({"calls": [{"method": m, "params": p} for m, p in calls]},
+                          ensure_ascii=False, default=str).encode("utf-8")
+        try:
+            conn, reused = self._pool.get_nowait(), True
+        except queue.Empty:
+            conn, reused = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout), False
+        try:
+            payload = self._post(conn, body)
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            conn.close()
+            # only reads are safe to resend: a write may have been applied before the disconnect
+            if not reused or not all(m in READ_METHODS for m, _ in calls):
+                raise
+            # pooled keep-alive connection was closed by the server; retry once on a fresh one
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                payload = self._post(conn, body)
+            except Exception:
+                conn.close()
+                raise
+        except Exception:
+            conn.close()
+            raise
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+        results = []
+        for r in payload["results"]:
+            if "error" in r:
+                if r["error"].startswith("KeyError:"):
+                    raise KeyError(r["error"].split(":", 1)[1].strip().strip("'"))
+                raise SchedulerServiceError(r["error"])
+            results.append(r["result"])
+        return results
+
+    def _call(self, method, **params):
+        return self.batch([(method, params)])[0]
+
+    def tasks(self):
+        return self._call("tasks")
+
+    def timer_payload(self, lookahead_days=WARM_LOOKAHEAD_DAYS):
+        return self._call("timer_payload", lookahead_days=lookahead_days)
+
+    def schedule_batch(self, items, default_nim=None, night_start=DEFAULT_NIGHT_START,
+                       night_end=DEFAULT_NIGHT_END, max_days=MAX_DAYS_AHEAD_DEFAULT, min_chunk=0, strategy="first"):
+        return self._call("schedule_batch", items=items, default_nim=default_nim, night_start=night_start,
+                          night_end=night_end, max_days=max_days, min_chunk=min_chunk, strategy=strategy)
+
+    def delete_task(self, task_id):
+        return self._call("delete_task", task_id=task_id)
+
+    def reassign_task(self, task_id, new_date, default_nim=None):
+        return self._call("reassign_task", task_id=task_id, new_date=new_date, default_nim=default_nim)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Local scheduling daemon for streamlit_app.py")
+    ap.add_argument("--host", default=DEFAULT_HOST)
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = ap.parse_args()
+    serve(args.host, args.port)
@@ -4,206 +4,74 @@
 
 import streamlit as st
 import pandas as pd
-import json, os, uuid
-from datetime import date, datetime as dt, timedelta
+import json, os, threading
+from datetime import datetime as dt
+
+from scheduler_core import (DATA_FILE, DB, MAX_DAYS_AHEAD_DEFAULT, WEEKDAY_MAP, LocalScheduler, build_warm_index,
+                            convert_weekday_to_date, data_signature, ensure_files_exist, gen_id,
+                            hitung_bobot_prioritas, hitung_waktu_belajar, load_tasks, parse_iso_date)
+from scheduler_service import SchedulerClient
 
 # -------------------------
-# Config / files
+# Config
 # -------------------------
-DATA_FILE = "tasks.json"   # stores tasks list
-USERS_FILE = "users.json"  # optional extra user storage (not necessary)
 ALARM_URL = "https://actions.google.com/sounds/v1/alarms/alarm_clock.ogg"  # louder alarm sound
-
-# default scheduling window (in minutes from midnight)
-DEFAULT_NIGHT_START = 19 * 60
-DEFAULT_NIGHT_END = 22 * 60
-MAX_DAYS_AHEAD_DEFAULT = 60
-
-# create file if missing
-def ensure_files_exist():
-    if not os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
-    if not os.path.exists(USERS_FILE):
-        # create users.json from demo DB (optional)
-        with open(USERS_FILE, "w", encoding="utf-8") as f:
-            json.dump([], f)
+# set to e.g. http://127.0.0.1:8765 to use the shared scheduler_service.py daemon instead of in-process scheduling
+SCHEDULER_URL = os.environ.get("SCHEDULER_URL", "").strip()
 
 ensure_files_exist()
 
 # -------------------------
-# Demo database (jadwal kuliah)
-# -------------------------
-def buat_database_mahasiswa():
-    return {
-        "16725186": {
-            "nama": "Jean Fide Tjahjamuljo",
-            "jadwal_kuliah": {
-                "Senin": ["08:00-10:00", "13:00-15:00"],
-                "Selasa": ["10:00-12:00"],
-                "Rabu": ["08:00-10:00", "15:00-17:00"],
-                "Kamis": ["13:00-15:00"],
-                "Jumat": ["10:00-12:00"]
-            }
-        },
-        "16725193": {
-            "nama": "Farel Ahmad",
-            "jadwal_kuliah": {
-                "Senin": ["10:00-12:00"],
-                "Selasa": ["08:00-10:00", "13:00-15:00"],
-                "Rabu": ["10:00-12:00"],
-                "Kamis": ["08:00-10:00", "15:00-17:00"],
-                "Jumat": ["13:00-15:00"]
-            }
-        },
-        "16725305": {
-            "nama": "Nindya Cettakirana Bintoro",
-            "jadwal_kuliah": {
-                "Senin": ["08:00-10:00"],
-                "Selasa": ["10:00-12:00", "15:00-17:00"],
-                "Rabu": ["13:00-15:00"],
-                "Kamis": ["08:00-10:00", "13:00-15:00"],
-                "Jumat": ["10:00-12:00"]
-            }
-        }
-    }
-
-DB = buat_database_mahasiswa()
-
-# -------------------------
-# Persistence helpers
+# Background warm-up (in-process mode)
 # -------------------------
-def load_tasks():
+# Streamlit has no server-start hook, so the first script run of the process starts a
+# daemon thread that builds the WarmIndex (see scheduler_core). Pages use it only while
+# it matches the current tasks.json and today's date; otherwise they take the slow path
+# while a rebuild runs in the background.
+@st.cache_resource
+def _warm_state():
+    return {"lock": threading.Lock(), "current": None, "building": False, "error": None, "failed_sig": None}
+
+def _warm_up(state, sig):
     try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except:
-        return []
-
-def save_tasks(tasks):
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(tasks, f, ensure_ascii=False, indent=2, default=str)
-
-# -------------------------
-# Time helpers
-# -------------------------
-def hm_to_minutes(hm):
-    h, m = map(int, hm.split(":"))
-    return h*60 + m
-
-def minutes_to_hm(minutes):
-    h = minutes // 60
-    m = minutes % 60
-    return f"{h:02d}:{m:02d}"
-
-def parse_iso_date(s):
-    try:
-        return dt.strptime(s, "%Y-%m-%d").date()
-    except:
-        return None
-
-# -------------------------
-# Scheduling logic
-# -------------------------
-WEEKDAY_MAP = {"Senin":0,"Selasa":1,"Rabu":2,"Kamis":3,"Jumat":4,"Sabtu":5,"Minggu":6}
-IDX_TO_DAY = {v:k for k,v in WEEKDAY_MAP.items()}
-
-def convert_weekday_to_date(weekday, week_number, month, year):
-    weekday = weekday.capitalize()
-    if weekday not in WEEKDAY_MAP:
-        return None
-    target = WEEKDAY_MAP[weekday]
-    try:
-        d = date(year, month, 1)
-    except:
-        return None
-    count = 0
-    while d.month == month:
-        if d.weekday() == target:
-            count += 1
-            if count == week_number:
-                return d
-        d += timedelta(days=1)
+        index = build_warm_index(load_tasks(), sig)
+        with state["lock"]:
+            state["current"] = index
+            state["error"] = state["failed_sig"] = None
+    except Exception as e:
+        with state["lock"]:
+            state["error"], state["failed_sig"] = e, sig
+    finally:
+        with state["lock"]:
+            state["building"] = False
+
+def warm_index():
+    """Warm index matching tasks.json now, or None (then use the slow path). Starts a rebuild if needed."""
+    state = _warm_state()
+    sig = data_signature()
+    with state["lock"]:
+        current = state["current"]
+        if current is not None and current.sig == sig:
+            return current
+        # don't retry a build that just failed for this tasks.json; the next save changes sig
+        if not state["building"] and state["failed_sig"] != sig:
+            state["building"], state["error"] = True, None
+            threading.Thread(target=_warm_up, args=(state, sig), daemon=True, name="task-warmup").start()
     return None
 
-def merge_intervals(intervals):
-    if not intervals:
-        return []
-    intervals = sorted(intervals, key=lambda x: x[0])
-    merged = [list(intervals[0])]
-    for s,e in intervals[1:]:
-        if s <= merged[-1][1]:
-            merged[-1][1] = max(merged[-1][1], e)
-        else:
-            merged.append([s,e])
-    return merged
-
-def get_class_occupied_for_date(nim, target_date):
-    occ = []
-    if not nim or nim not in DB:
-        return occ
-    jadwal = DB[nim].get("jadwal_kuliah", {})
-    hari = IDX_TO_DAY[target_date.weekday()]
-    for times in jadwal.get(hari, []):
-        try:
-            s,e = times.split("-")
-            occ.append([hm_to_minutes(s), hm_to_minutes(e)])
-        except:
-            continue
-    return occ
-
-def get_tasks_occupied_for_date(all_tasks, target_date, ignore_task_id=None):
-    occ = []
-    for t in all_tasks:
-        if ignore_task_id and t.get("id") == ignore_task_id:
-            continue
-        try:
-            if parse_iso_date(t.get("date")) == target_date:
-                occ.append([hm_to_minutes(t["start"]), hm_to_minutes(t["end"])])
-        except:
-            continue
-    return occ
-
-def find_slot_for_task(all_tasks, nim, requested_date, duration_minutes, ignore_task_id=None,
-                       night_start=DEFAULT_NIGHT_START, night_end=DEFAULT_NIGHT_END, max_days=MAX_DAYS_AHEAD_DEFAULT):
-    search_date = requested_date
-    for offset in range(max_days):
-        occ = get_tasks_occupied_for_date(all_tasks, search_date, ignore_task_id=ignore_task_id) + get_class_occupied_for_date(nim, search_date)
-        merged = merge_intervals(occ)
-        if not merged:
-            if night_start + duration_minutes <= night_end:
-                return (search_date, minutes_to_hm(night_start), minutes_to_hm(night_start + duration_minutes))
-        else:
-            if night_start + duration_minutes <= merged[0][0]:
-                return (search_date, minutes_to_hm(night_start), minutes_to_hm(night_start + duration_minutes))
-            for i in range(len(merged)-1):
-                gap_start = max(merged[i][1], night_start)
-                gap_end = min(merged[i+1][0], night_end)
-                if gap_start + duration_minutes <= gap_end:
-                    return (search_date, minutes_to_hm(gap_start), minutes_to_hm(gap_start + duration_minutes))
-            last_end = max(merged[-1][1], night_start)
-            if last_end + duration_minutes <= night_end:
-                return (search_date, minutes_to_hm(last_end), minutes_to_hm(last_end + duration_minutes))
-        search_date = search_date + timedelta(days=1)
-    return None
+@st.cache_resource
+def _scheduler_client(url):
+    # one pooled client per Streamlit process
+    return SchedulerClient(url)
 
-# -------------------------
-# Priority & duration
-# -------------------------
-def hitung_waktu_belajar(kesulitan):
-    if kesulitan == 1: return 30
-    if kesulitan == 2: return 60
-    if kesulitan == 3: return 90
-    return 120
+# task tables: parts of a split session carry split_of (the queue id; deleting it removes all parts) and part/parts
+TASK_TABLE_COLUMNS = ["id","mapel","date","start","end","duration_minutes","user_nim","split_of","part","parts"]
 
-def hitung_bobot_prioritas(prioritas, kesulitan):
-    return prioritas + kesulitan
-
-# -------------------------
-# ID gen
-# -------------------------
-def gen_id():
-    return str(uuid.uuid4())[:8]
+def task_table(df):
+    table = df.reindex(columns=TASK_TABLE_COLUMNS)
+    table["split_of"] = table["split_of"].fillna("")
+    table[["part","parts"]] = table[["part","parts"]].astype("Int64")
+    return table
 
 # -------------------------
 # Streamlit UI
@@ -211,15 +79,38 @@ def gen_id():
 st.set_page_config(page_title="Study Scheduler Final", layout="wide")
 st.title("Study Scheduler — Final (Streamlit)")
 
+# task store: the shared daemon if SCHEDULER_URL is set, else in-process with the warm index
+# (warm is None until the background warm-up has finished for the current tasks.json)
+warm = None if SCHEDULER_URL else warm_index()
+scheduler = _scheduler_client(SCHEDULER_URL) if SCHEDULER_URL else LocalScheduler(warm)
+
 # session state initialization
 if "queue" not in st.session_state: st.session_state.queue = []
-if "tasks" not in st.session_state: st.session_state.tasks = load_tasks()
 if "user_nim" not in st.session_state: st.session_state.user_nim = ""
 if "user_name" not in st.session_state: st.session_state.user_name = ""
 
 # Sidebar
 st.sidebar.title("Menu")
 menu = st.sidebar.radio("", ["Login", "Input Kegiatan", "Generate Jadwal", "Lihat Jadwal", "Edit / Hapus", "Timer", "Export", "About"])
+if SCHEDULER_URL:
+    st.sidebar.caption(f"Scheduler: {SCHEDULER_URL}")
+else:
+    warm_error = _warm_state()["error"]
+    if warm is not None:
+        st.sidebar.caption("Index: siap")
+    elif warm_error is not None:
+        st.sidebar.caption(f"Index gagal: {warm_error}")
+    else:
+        st.sidebar.caption("Index: pemanasan...")
+
+# with the shared daemon, fetch this page's tasks and the auto-timer payload in one round-trip;
+# None means "ask the scheduler directly" (in-process path, or the data changed during this rerun)
+page_tasks = timer_tasks = None
+if SCHEDULER_URL:
+    calls = [("timer_payload", {"lookahead_days": 14})]
+    if menu in ("Lihat Jadwal", "Edit / Hapus", "Export"):
+        calls.append(("tasks", {}))
+    timer_tasks, page_tasks = (scheduler.batch(calls) + [None])[:2]
 
 # --- Login ---
 if menu == "Login":
@@ -308,54 +199,45 @@ elif menu == "Generate Jadwal":
         night_start_h = st.number_input("Jam mulai malam (jam 24h)", min_value=0, max_value=23, value=19)
         night_end_h = st.number_input("Jam akhir malam (jam 24h)", min_value=1, max_value=23, value=22)
         max_days = st.number_input("Maks hari pencarian slot (hari)", min_value=7, max_value=365, value=MAX_DAYS_AHEAD_DEFAULT)
+        st.caption("Jam malam dipakai jika mahasiswa tidak punya jadwal_belajar sendiri.")
+        min_chunk = st.number_input("Pecah sesi jika tidak muat: minimal menit per sesi (0 = jangan dipecah)",
+                                    min_value=0, max_value=120, value=0, step=15)
+        strategy = st.radio("Pilih celah", ["first", "best"], horizontal=True,
+                            format_func=lambda x: {"first": "Paling awal", "best": "Paling pas"}[x])
         if st.button("Generate & Simpan"):
-            tasks = load_tasks()
             def deadline_key(it):
                 if it.get("deadline"):
                     d = parse_iso_date(it["deadline"])
                     return d or dt.max.date()
                 return dt.max.date()
             queue_sorted = sorted(st.session_state.queue, key=lambda x: (-x["bobot"], deadline_key(x)))
+            results = scheduler.schedule_batch(queue_sorted, default_nim=st.session_state.user_nim or None,
+                                               night_start=night_start_h*60, night_end=night_end_h*60, max_days=max_days,
+                                               min_chunk=int(min_chunk), strategy=strategy)
+            timer_tasks = None
             added = 0
-            for it in queue_sorted:
-                req = parse_iso_date(it["requested_date"])
-                dur = it["duration_minutes"]
-                nim_for_check = it.get("user_nim") or st.session_state.user_nim or None
-                slot = find_slot_for_task(tasks, nim_for_check, req, dur, ignore_task_id=None,
-                                          night_start=night_start_h*60, night_end=night_end_h*60, max_days=max_days)
-                if not slot:
+            for it, parts in zip(queue_sorted, results):
+                if not parts:
                     st.warning(f"Tidak menemukan slot untuk {it['mapel']} dalam {max_days} hari.")
                     continue
-                assigned_date, start, end = slot
-                newtask = {
-                    "id": it["id"],
-                    "mapel": it["mapel"],
-                    "jenis": it["jenis"],
-                    "date": assigned_date.isoformat(),
-                    "start": start,
-                    "end": end,
-                    "duration_minutes": dur,
-                    "user_nim": nim_for_check,
-                    "created_at": dt.now().isoformat()
-                }
-                tasks.append(newtask)
                 added += 1
-                st.success(f"Terjadwal: {newtask['mapel']} pada {newtask['date']} {newtask['start']}-{newtask['end']}")
-            save_tasks(tasks)
+                for newtask in parts:
+                    sesi = f" (sesi {newtask['part']}/{newtask['parts']})" if "part" in newtask else ""
+                    st.success(f"Terjadwal: {newtask['mapel']}{sesi} pada {newtask['date']} {newtask['start']}-{newtask['end']}")
             st.session_state.queue = []
             st.info(f"Selesai. {added} tugas tersimpan ke {DATA_FILE}.")
 
 # --- Lihat Jadwal ---
 elif menu == "Lihat Jadwal":
     st.header("Lihat Jadwal (persisted)")
-    tasks = load_tasks()
+    tasks = page_tasks if page_tasks is not None else scheduler.tasks()
     if not tasks:
         st.info("Belum ada tugas tersimpan.")
     else:
         df = pd.DataFrame(tasks)
         df = df.sort_values(["date","start"])
         st.subheader("Tabel tugas")
-        st.dataframe(df[["id","mapel","date","start","end","duration_minutes","user_nim"]])
+        st.dataframe(task_table(df))
 
         try:
             import plotly.express as px
@@ -371,21 +253,24 @@ elif menu == "Lihat Jadwal":
 # --- Edit / Hapus ---
 elif menu == "Edit / Hapus":
     st.header("Edit / Hapus Tugas (Reassign fixed)")
-    tasks = load_tasks()
+    tasks = page_tasks if page_tasks is not None else scheduler.tasks()
     if not tasks:
         st.info("Belum ada tugas.")
     else:
         df = pd.DataFrame(tasks).sort_values(["date","start"])
-        st.dataframe(df[["id","mapel","date","start","end","duration_minutes","user_nim"]])
+        st.dataframe(task_table(df))
         st.markdown("### Hapus tugas")
-        del_id = st.text_input("ID tugas untuk dihapus")
+        del_id = st.text_input("ID tugas untuk dihapus (ID di kolom split_of menghapus semua sesinya)")
         if st.button("Hapus tugas"):
             if not del_id:
                 st.warning("Isi ID.")
             else:
-                new_tasks = [t for t in tasks if t.get("id") != del_id]
-                save_tasks(new_tasks)
-                st.success("Tugas dihapus.")
+                removed = scheduler.delete_task(del_id)
+                timer_tasks = None
+                if removed:
+                    st.success(f"{removed} tugas dihapus.")
+                else:
+                    st.warning("ID tidak ditemukan.")
 
         st.markdown("---")
         st.markdown("### Reassign tugas (hapus dulu lalu cari slot tanpa tugas lama)")
@@ -415,20 +300,16 @@ elif menu == "Edit / Hapus":
                         if not new_date:
                             st.error("Tanggal invalid.")
                         else:
-                            tasks_without_old = [t for t in tasks if t.get("id") != edit_id]
-                            dur = found.get("duration_minutes", 60)
-                            nim_for_check = found.get("user_nim") or st.session_state.user_nim or None
-                            slot = find_slot_for_task(tasks_without_old, nim_for_check, new_date, dur, ignore_task_id=None)
-                            if not slot:
-                                st.error("Tidak menemukan slot dalam batas pencarian.")
+                            try:
+                                updated = scheduler.reassign_task(edit_id, new_date, default_nim=st.session_state.user_nim or None)
+                                timer_tasks = None
+                            except KeyError:
+                                st.error("ID tidak ditemukan.")
                             else:
-                                assigned_date, start, end = slot
-                                found["date"] = assigned_date.isoformat()
-                                found["start"] = start
-                                found["end"] = end
-                                updated = tasks_without_old + [found]
-                                save_tasks(updated)
-                                st.success(f"Berhasil reassign: {found['mapel']} -> {found['date']} {found['start']}-{found['end']}")
+                                if not updated:
+                                    st.error("Tidak menemukan slot dalam batas pencarian.")
+                                else:
+                                    st.success(f"Berhasil reassign: {updated['mapel']} -> {updated['date']} {updated['start']}-{updated['end']}")
 
 # --- Timer (with louder looping alarm + safe JS formatting) ---
 elif menu == "Timer":
@@ -551,7 +432,7 @@ elif menu == "Timer":
 # --- Export ---
 elif menu == "Export":
     st.header("Export / Backup")
-    tasks = load_tasks()
+    tasks = page_tasks if page_tasks is not None else scheduler.tasks()
     if not tasks:
         st.info("Tidak ada data.")
     else:
@@ -565,6 +446,7 @@ elif menu == "About":
     st.markdown("""
     Versi final Streamlit (persistence + improved alarm).\n
     - Data tasks disimpan di `tasks.json` di folder yang sama.\n
+    - Dengan `TASKS_SNAPSHOT=tasks.snap` (dan numpy), snapshot biner ikut ditulis setiap simpan agar auto-timer tidak perlu membaca ulang seluruh JSON.\n
     - Alarm menggunakan HTML audio loop dengan volume 1.0 (lebih keras) dan tombol STOP.\n
     - Jika ingin suara lokal custom, taruh file audio di folder static/public dan ganti ALARM_URL.\n
     - Jika ada bug atau fitur tambahan (Google Calendar export, notifikasi desktop), kabari aja.
@@ -574,38 +456,8 @@ elif menu == "About":
 # Auto-Timer Floating (Bottom-right, always visible)
 # -------------------------
 
-def _build_tasks_for_js(all_tasks, lookahead_days=7):
-    """Return list of task dicts with start/end in ms since epoch for next lookahead_days."""
-    out = []
-    now = dt.now()
-    end_limit = now + timedelta(days=lookahead_days)
-    for t in all_tasks:
-        try:
-            d = parse_iso_date(t.get("date"))
-            if d is None:
-                continue
-            # Only consider tasks within lookahead window
-            if not (now.date() <= d <= end_limit.date()):
-                continue
-            start_hm = t.get("start")
-            end_hm = t.get("end")
-            if not start_hm or not end_hm:
-                continue
-            start_dt = dt.combine(d, dt.strptime(start_hm, "%H:%M").time())
-            end_dt = dt.combine(d, dt.strptime(end_hm, "%H:%M").time())
-            # convert to milliseconds (JS-friendly)
-            out.append({
-                "id": t.get("id"),
-                "mapel": t.get("mapel"),
-                "start_ms": int(start_dt.timestamp() * 1000),
-                "end_ms": int(end_dt.timestamp() * 1000)
-            })
-        except Exception:
-            continue
-    return out
-
 # Render the floating auto-timer component on every page
-tasks_for_js = _build_tasks_for_js(load_tasks(), lookahead_days=14)
+tasks_for_js = timer_tasks if timer_tasks is not None else scheduler.timer_payload(lookahead_days=14)
 tasks_json = json.dumps(tasks_for_js)
 
 html_auto_timer = f"""
@@ -683,7 +535,7 @@ function playAlarmLoop() {{
   if (muted) return;
   try {{
     alarm.loop = true;
-    alarm.play().catch(()=>{});
+    alarm.play().catch(()=>{{}});
     alarmPlaying = true;
     document.getElementById('stopAlarmBtn').style.display = 'inline-block';
   }} catch(e) {{
@@ -724,15 +576,15 @@ function startCountdownFor(taskObj) {{
     if (now < start_ms) {{
       const remainingSec = Math.ceil((start_ms - now) / 1000);
       document.getElementById('autoTimerContent').innerHTML =
-        `<div class="small">Akan mulai: \${{new Date(start_ms).toLocaleString()}}</div>
-         <div class="time">\${{fmtSeconds(remainingSec)}}</div>
-         <div class="small">Mata pelajaran: \${{taskObj.mapel}}</div>`;
+        `<div class="small">Akan mulai: ${{new Date(start_ms).toLocaleString()}}</div>
+         <div class="time">${{fmtSeconds(remainingSec)}}</div>
+         <div class="small">Mata pelajaran: ${{taskObj.mapel}}</div>`;
     }} else {{
       const remainingSec = Math.ceil((end_ms - now) / 1000);
       document.getElementById('autoTimerContent').innerHTML =
         `<div class="small">Sedang belajar — selesai:</div>
-         <div class="time">\${{fmtSeconds(remainingSec)}}</div>
-         <div class="small">Mata pelajaran: \${{taskObj.mapel}}</div>`;
+         <div class="time">${{fmtSeconds(remainingSec)}}</div>
+         <div class="small">Mata pelajaran: ${{taskObj.mapel}}</div>`;
 
       if (remainingSec <= 0) {{
         clearInterval(countdownInterval);
@@ -776,19 +628,9 @@ function mainLoop() {{
   }}
 }}
 
-html_auto_timer = """
-<script>
-  function playAlarmLoop() {
-      if (muted) return;
-      try {
-          alarm.loop = true;
-          alarm.play().catch(()=>{});
-          alarmPlaying = true;
-          document.getElementById('stopAlarmBtn').style.display = 'inline-block';
-      } catch(e){ console.error(e); }
-  }
-
-  mainLoop();
-  setInterval(mainLoop, 3000);
+mainLoop();
+setInterval(mainLoop, 3000);
 </script>
 """
+
+st.components.v1.html(html_auto_timer, height=200)
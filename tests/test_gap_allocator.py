@@ -0,0 +1,133 @@
+import os, random, sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scheduler_core as sc
+from scheduler_core import (DEFAULT_NIGHT_END, DEFAULT_NIGHT_START, GapAllocator, LocalScheduler, build_day_index,
+                            find_slot_for_task, get_class_occupied_for_date, get_tasks_occupied_for_date,
+                            hm_to_minutes, merge_intervals, minutes_to_hm)
+
+DAY = date(2026, 10, 20)
+
+def old_find_slot_for_task(all_tasks, nim, requested_date, duration_minutes, ignore_task_id=None,
+                           night_start=DEFAULT_NIGHT_START, night_end=DEFAULT_NIGHT_END, max_days=60):
+    # the per-day scan GapAllocator replaced (baseline streamlit_app.py)
+    search_date = requested_date
+    for offset in range(max_days):
+        occ = get_tasks_occupied_for_date(all_tasks, search_date, ignore_task_id=ignore_task_id) + get_class_occupied_for_date(nim, search_date)
+        merged = merge_intervals(occ)
+        if not merged:
+            if night_start + duration_minutes <= night_end:
+                return (search_date, minutes_to_hm(night_start), minutes_to_hm(night_start + duration_minutes))
+        else:
+            if night_start + duration_minutes <= merged[0][0]:
+                return (search_date, minutes_to_hm(night_start), minutes_to_hm(night_start + duration_minutes))
+            for i in range(len(merged)-1):
+                gap_start = max(merged[i][1], night_start)
+                gap_end = min(merged[i+1][0], night_end)
+                if gap_start + duration_minutes <= gap_end:
+                    return (search_date, minutes_to_hm(gap_start), minutes_to_hm(gap_start + duration_minutes))
+            last_end = max(merged[-1][1], night_start)
+            if last_end + duration_minutes <= night_end:
+                return (search_date, minutes_to_hm(last_end), minutes_to_hm(last_end + duration_minutes))
+        search_date = search_date + timedelta(days=1)
+    return None
+
+def task(tid, d, start, end):
+    return {"id": tid, "date": d.isoformat(), "start": start, "end": end}
+
+def allocator(tasks, days=1, nim=None, **kw):
+    return GapAllocator(nim, DAY, days, build_day_index(tasks), **kw)
+
+def hm(slots):
+    return [(d, minutes_to_hm(s), minutes_to_hm(e)) for d, s, e in slots]
+
+# the maintainer's example: free 19:00-20:00, 20:10-20:50, 21:10-22:00
+THREE_GAPS = [task("a", DAY, "20:00", "20:10"), task("b", DAY, "20:50", "21:10")]
+
+# -------------------------
+# Single slot (find_slot_for_task)
+# -------------------------
+def test_matches_old_find_slot():
+    # nims without jadwal_belajar, so the study window is [night_start, night_end] like before
+    nims = [None] + [nim for nim, data in sc.DB.items() if "jadwal_belajar" not in data]
+    rng = random.Random(1234)
+    checked = 0
+    for _ in range(400):
+        tasks = []
+        for i in range(rng.randint(0, 12)):
+            d = DAY + timedelta(days=rng.randint(0, 4))
+            s = rng.randrange(17 * 60, 23 * 60, 5)
+            tasks.append(task(str(i), d, minutes_to_hm(s), minutes_to_hm(s + rng.choice([15, 30, 45, 60, 90]))))
+        nim = rng.choice(nims)
+        duration = rng.choice([15, 30, 45, 60, 90, 120])
+        ignore = rng.choice([None, "0", "1"])
+        old = old_find_slot_for_task(tasks, nim, DAY, duration, ignore_task_id=ignore, max_days=5)
+        new = find_slot_for_task(tasks, nim, DAY, duration, ignore_task_id=ignore, max_days=5)
+        if old is not None and hm_to_minutes(old[2]) > DEFAULT_NIGHT_END:
+            # the old scan could hand out a slot running past night_end; the allocator never does
+            assert new is None or hm_to_minutes(new[2]) <= DEFAULT_NIGHT_END
+            continue
+        assert new == old
+        checked += 1
+    assert checked > 300
+
+def test_find_slot_uses_day_index_and_roster():
+    tasks = [task("a", DAY, "19:00", "20:00")]
+    nim = next(iter(sc.DB))
+    expected = find_slot_for_task(tasks, nim, DAY, 60)
+    warm = sc.build_warm_index(tasks, None)
+    assert find_slot_for_task(None, nim, DAY, 60, day_index=warm.day_index, roster=warm.roster) == expected
+
+# -------------------------
+# Split sessions
+# -------------------------
+def test_split_around_block():
+    alloc = allocator([task("a", DAY, "19:45", "20:15")])
+    assert alloc.allocate(DAY, 120, max_days=1) is None
+    assert hm(alloc.allocate(DAY, 120, max_days=1, min_chunk=30)) == [(DAY, "19:00", "19:45"), (DAY, "20:15", "21:30")]
+    assert alloc.gaps[0] == [[1290, 1320]]
+
+def test_contiguous_slot_preferred_over_split():
+    alloc = allocator([task("a", DAY, "19:45", "20:15")], days=2)
+    assert hm(alloc.allocate(DAY, 120, max_days=2, min_chunk=30)) == [(DAY + timedelta(days=1), "19:00", "21:00")]
+
+def test_chunks_respect_min_chunk():
+    alloc = allocator(THREE_GAPS)
+    parts = alloc.allocate(DAY, 100, max_days=1, min_chunk=45)
+    assert parts is not None
+    assert sum(e - s for _, s, e in parts) == 100
+    assert all(e - s >= 45 for _, s, e in parts)
+
+def test_failed_split_reserves_nothing():
+    alloc = allocator(THREE_GAPS)
+    before = [list(map(list, g)) for g in alloc.gaps]
+    assert alloc.allocate(DAY, 200, max_days=1, min_chunk=30) is None
+    assert alloc.gaps == before
+    assert alloc.allocate(DAY, 60, max_days=1) == [(DAY, 1140, 1200)]
+
+def test_min_chunk_not_below_duration():
+    alloc = allocator(THREE_GAPS)
+    assert alloc.allocate(DAY, 90, max_days=1, min_chunk=90) is None
+
+# -------------------------
+# Best fit
+# -------------------------
+def test_best_fit_picks_tightest_gap():
+    assert hm(allocator(THREE_GAPS).allocate(DAY, 35, max_days=1)) == [(DAY, "19:00", "19:35")]
+    assert hm(allocator(THREE_GAPS).allocate(DAY, 35, max_days=1, strategy="best")) == [(DAY, "20:10", "20:45")]
+    assert hm(allocator(THREE_GAPS).allocate(DAY, 45, max_days=1, strategy="best")) == [(DAY, "21:10", "21:55")]
+
+def test_best_fit_split_parts_are_chronological():
+    parts = allocator(THREE_GAPS).allocate(DAY, 100, max_days=1, min_chunk=30, strategy="best")
+    assert hm(parts) == [(DAY, "19:00", "19:30"), (DAY, "20:10", "20:50"), (DAY, "21:10", "21:40")]
+
+def test_schedule_batch_numbers_parts_in_time_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sc.save_tasks(THREE_GAPS)
+    item = {"id": "q1", "mapel": "Kalkulus", "jenis": "Tugas", "requested_date": DAY.isoformat(), "duration_minutes": 100}
+    [parts] = LocalScheduler().schedule_batch([item], max_days=1, min_chunk=30, strategy="best")
+    assert [(p["part"], p["start"]) for p in parts] == [(1, "19:00"), (2, "20:10"), (3, "21:10")]
+    assert all(p["split_of"] == "q1" and p["parts"] == 3 for p in parts)
+    assert LocalScheduler().delete_task("q1") == 3
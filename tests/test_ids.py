@@ -0,0 +1,81 @@
+import os, sys, threading
+from datetime import date, datetime as dt, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scheduler_core as sc
+from scheduler_core import (ULID_LEN, ULID_TIME_LEN, LocalScheduler, _b32_encode, gen_id, id_timestamp, is_ulid,
+                            task_order_key, tasks_created_between)
+
+MS = 1792414045123  # 2026-10-19, a millisecond that is not a whole second
+
+def ulid(ms, rand=0):
+    return _b32_encode(ms, ULID_TIME_LEN) + _b32_encode(rand, ULID_LEN - ULID_TIME_LEN)
+
+def fresh_state(monkeypatch, ms=0, rand=0):
+    monkeypatch.setattr(sc, "_id_state", {"lock": threading.Lock(), "ms": ms, "rand": rand})
+
+# -------------------------
+# gen_id
+# -------------------------
+def test_gen_id_monotonic_within_one_millisecond(monkeypatch):
+    fresh_state(monkeypatch)
+    monkeypatch.setattr(sc.time, "time", lambda: MS / 1000)
+    ids = [gen_id() for _ in range(1000)]
+    assert all(is_ulid(i) for i in ids)
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    assert {i[:ULID_TIME_LEN] for i in ids} == {ulid(MS)[:ULID_TIME_LEN]}
+
+def test_gen_id_monotonic_when_clock_moves_back(monkeypatch):
+    fresh_state(monkeypatch)
+    monkeypatch.setattr(sc.time, "time", lambda: MS / 1000)
+    first = gen_id()
+    monkeypatch.setattr(sc.time, "time", lambda: (MS - 5000) / 1000)
+    assert gen_id() > first
+
+def test_gen_id_random_part_overflow_moves_to_next_millisecond(monkeypatch):
+    fresh_state(monkeypatch, ms=MS, rand=(1 << 80) - 1)
+    monkeypatch.setattr(sc.time, "time", lambda: MS / 1000)
+    nxt = gen_id()
+    assert nxt > ulid(MS, (1 << 80) - 1)
+    assert nxt[:ULID_TIME_LEN] == ulid(MS + 1)[:ULID_TIME_LEN]
+
+def test_id_timestamp():
+    assert id_timestamp(ulid(MS)) == dt.fromtimestamp(MS / 1000)
+    assert id_timestamp("1a2b3c4d") is None
+
+# -------------------------
+# Ordering and range scan
+# -------------------------
+def test_task_order_key_mixes_old_and_new_ids():
+    when = id_timestamp(ulid(MS))
+    old_before = {"id": "ffffffff", "created_at": (when - timedelta(seconds=1)).isoformat()}
+    new = {"id": ulid(MS)}
+    old_after = {"id": "00000000", "created_at": (when + timedelta(seconds=1)).isoformat()}
+    no_created_at = {"id": "12345678"}
+    tasks = [old_after, new, old_before, no_created_at]
+    assert sorted(tasks, key=task_order_key) == [no_created_at, old_before, new, old_after]
+
+def test_tasks_created_between_bounds_on_a_millisecond():
+    tasks = [{"id": ulid(MS + k, rand)} for k in (-1, 0, 1, 2) for rand in (0, (1 << 80) - 1)]
+    start, end = id_timestamp(tasks[2]["id"]), id_timestamp(tasks[6]["id"])  # MS and MS + 2
+    got = tasks_created_between(tasks, start, end)
+    assert [t["id"][:ULID_TIME_LEN] for t in got] == [ulid(MS)[:ULID_TIME_LEN]] * 2 + [ulid(MS + 1)[:ULID_TIME_LEN]] * 2
+    assert tasks_created_between(tasks, start, start) == []
+
+def test_tasks_created_between_includes_old_ids():
+    when = id_timestamp(ulid(MS))
+    old = {"id": "abcd1234", "created_at": when.isoformat()}
+    tasks = sorted([{"id": ulid(MS - 10)}, old, {"id": ulid(MS + 10)}], key=task_order_key)
+    assert tasks_created_between(tasks, when, when + timedelta(milliseconds=1)) == [old]
+
+def test_schedule_batch_stamps_created_at_from_id(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    qid = ulid(MS, 7)
+    item = {"id": qid, "mapel": "Fisika", "jenis": "Tugas", "requested_date": date.today().isoformat(),
+            "duration_minutes": 30}
+    [[task]] = LocalScheduler().schedule_batch([item])
+    assert task["id"] == qid
+    assert task["created_at"] == id_timestamp(qid).isoformat()
+    saved = sc.load_tasks()
+    assert tasks_created_between(saved, id_timestamp(qid), id_timestamp(qid) + timedelta(milliseconds=1)) == saved
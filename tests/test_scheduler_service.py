@@ -0,0 +1,137 @@
+import http.client, json, os, sys, threading
+from datetime import date
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scheduler_core as sc
+import scheduler_service as ss
+from scheduler_core import LocalScheduler, gen_id, load_tasks, save_tasks
+
+TODAY = date.today()
+
+def queue_item(mapel="Kalkulus", duration=60):
+    return {"id": gen_id(), "mapel": mapel, "jenis": "Tugas", "requested_date": TODAY.isoformat(),
+            "duration_minutes": duration}
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sc, "SNAPSHOT_FILE", None)
+    sc.ensure_files_exist()
+    return tmp_path
+
+# -------------------------
+# SchedulerStore
+# -------------------------
+def test_store_notices_a_save_right_after_its_own_write(workdir, monkeypatch):
+    store = ss.SchedulerStore()
+    store.index()
+    other = {"id": gen_id(), "mapel": "Other worker", "date": TODAY.isoformat(), "start": "08:00", "end": "09:00"}
+    original_save = LocalScheduler._save
+    def save_then_other_worker_saves(self, tasks):
+        original_save(self, tasks)
+        # a worker without SCHEDULER_URL saves before the daemon rebuilds its index
+        save_tasks(load_tasks() + [other])
+    monkeypatch.setattr(LocalScheduler, "_save", save_then_other_worker_saves)
+    store.call("schedule_batch", {"items": [queue_item()]})
+    assert other["id"] in [t["id"] for t in store.index().tasks]
+
+# -------------------------
+# Daemon + client over HTTP
+# -------------------------
+class DroppingHandler(ss._Handler):
+    """Applies the batch, then (while `drops` > 0) closes the connection instead of replying."""
+    drops = 0
+    posts = 0
+
+    def do_POST(self):
+        type(self).posts += 1
+        if type(self).drops <= 0:
+            return super().do_POST()
+        type(self).drops -= 1
+        length = int(self.headers.get("Content-Length", 0))
+        for c in json.loads(self.rfile.read(length))["calls"]:
+            try:
+                self.store.call(c["method"], c.get("params") or {})
+            except Exception:
+                pass
+        self.close_connection = True
+
+@pytest.fixture
+def service(workdir):
+    store = ss.SchedulerStore()
+    store.index()
+    handler = type("Handler", (DroppingHandler,), {"store": store, "drops": 0, "posts": 0})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = ss.SchedulerClient(f"http://127.0.0.1:{server.server_address[1]}", timeout=10)
+    yield client, handler
+    server.shutdown()
+    server.server_close()
+
+def test_round_trip(service):
+    client, _ = service
+    [[task]] = client.schedule_batch([queue_item()])
+    assert task["date"] == TODAY.isoformat() and (task["start"], task["end"]) == ("19:00", "20:00")
+    assert [t["id"] for t in client.tasks()] == [task["id"]] == [t["id"] for t in load_tasks()]
+    assert [p["id"] for p in client.timer_payload(14)] == [task["id"]]
+
+    moved = client.reassign_task(task["id"], date.fromordinal(TODAY.toordinal() + 3))
+    assert moved["id"] == task["id"] and moved["date"] == date.fromordinal(TODAY.toordinal() + 3).isoformat()
+    assert client.tasks()[0]["date"] == moved["date"]
+
+    assert client.delete_task(task["id"]) == 1
+    assert client.tasks() == [] == load_tasks()
+
+def test_split_parts_round_trip(service):
+    client, _ = service
+    save_tasks([{"id": gen_id(), "mapel": "Blok", "date": TODAY.isoformat(), "start": "19:45", "end": "20:15"}])
+    item = queue_item(duration=120)
+    [parts] = client.schedule_batch([item], max_days=1, min_chunk=30)
+    assert [(p["start"], p["end"], p["part"], p["split_of"]) for p in parts] == [
+        ("19:00", "19:45", 1, item["id"]), ("20:15", "21:30", 2, item["id"])]
+    assert client.delete_task(item["id"]) == 2
+
+def test_batch_returns_results_in_order(service):
+    client, handler = service
+    item = queue_item()
+    scheduled, tasks, payload = client.batch([("schedule_batch", {"items": [item]}), ("tasks", {}),
+                                              ("timer_payload", {"lookahead_days": 14})])
+    assert scheduled[0][0]["id"] == item["id"]
+    assert [t["id"] for t in tasks] == [item["id"]] == [p["id"] for p in payload]
+    assert handler.posts == 1
+
+def test_errors(service):
+    client, _ = service
+    with pytest.raises(KeyError) as exc:
+        client.reassign_task("01NOSUCHTASK", TODAY)
+    assert exc.value.args == ("01NOSUCHTASK",)
+    with pytest.raises(ss.SchedulerServiceError, match="unknown method"):
+        client.batch([("drop_table", {})])
+
+def test_dropped_pooled_connection_retries_reads(service):
+    client, handler = service
+    client.schedule_batch([queue_item()])  # leaves a pooled keep-alive connection
+    handler.drops = 1
+    assert len(client.tasks()) == 1
+    assert handler.posts == 3  # write, dropped read, retried read
+
+def test_dropped_pooled_connection_never_resends_writes(service):
+    client, handler = service
+    client.tasks()  # leaves a pooled keep-alive connection
+    handler.drops = 1
+    with pytest.raises((http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+        client.batch([("tasks", {}), ("schedule_batch", {"items": [queue_item()]})])
+    assert handler.posts == 2
+    assert len(load_tasks()) == 1  # applied once by the dropped request, not again
+
+def test_dropped_fresh_connection_is_not_retried(service):
+    client, handler = service
+    handler.drops = 1
+    with pytest.raises((http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+        client.tasks()
+    assert handler.posts == 1
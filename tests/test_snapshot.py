@@ -0,0 +1,90 @@
+import os, struct, sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("numpy")
+
+import scheduler_core as sc
+from scheduler_core import (SNAPSHOT_HEADER, LocalScheduler, _build_tasks_for_js, _build_tasks_for_js_from_snapshot,
+                            gen_id, load_snapshot, save_tasks)
+
+TODAY = date.today()
+
+def payload_key(p):
+    return (p["start_ms"], p["id"])
+
+def make_tasks():
+    tasks = []
+    for k, (days, start, end) in enumerate([(0, "20:00", "21:00"), (0, "19:00", "19:30"), (3, "19:15", "20:45"),
+                                             (20, "19:00", "20:00"), (-2, "19:00", "20:00")]):
+        tasks.append({"id": gen_id(), "mapel": f"Mapel {k} é", "date": (TODAY + timedelta(days=days)).isoformat(),
+                      "start": start, "end": end, "user_nim": "16725186"})
+    tasks.append({"id": gen_id(), "mapel": "no date", "date": None, "start": "19:00", "end": "20:00"})
+    return tasks
+
+@pytest.fixture
+def snapshot_on(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sc, "SNAPSHOT_FILE", "tasks.snap")
+    sc._open_snapshot.cache_clear()
+    yield tmp_path
+    sc._open_snapshot.cache_clear()
+
+def test_disabled_by_default(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sc, "SNAPSHOT_FILE", None)
+    save_tasks(make_tasks())
+    assert not os.path.exists("tasks.snap")
+    assert load_snapshot() is None
+
+def test_round_trip(snapshot_on):
+    tasks, _ = save_tasks(make_tasks())
+    snap = load_snapshot()
+    assert snap is not None and len(snap) == 5  # the dateless task is left out
+    assert list(snap.records["date"]) == sorted(snap.records["date"])
+    lo, hi = snap.date_slice(TODAY, TODAY)
+    assert sorted(snap.string(r["mapel_off"], r["mapel_len"]) for r in snap.records[lo:hi]) == ["Mapel 0 é", "Mapel 1 é"]
+    assert {snap.string(r["id_off"], r["id_len"]) for r in snap.records} == {t["id"] for t in tasks if t["date"]}
+    assert not [f for f in os.listdir(".") if f.endswith(".tmp")]
+
+def test_payload_matches_json_path(snapshot_on):
+    tasks, _ = save_tasks(make_tasks())
+    for days in (0, 3, 14, 30):
+        expected = sorted(_build_tasks_for_js(tasks, days), key=payload_key)
+        assert sorted(_build_tasks_for_js_from_snapshot(load_snapshot(), days), key=payload_key) == expected
+    assert sorted(LocalScheduler().timer_payload(14), key=payload_key) == sorted(_build_tasks_for_js(tasks, 14), key=payload_key)
+
+def test_stale_snapshot_ignored(snapshot_on):
+    save_tasks(make_tasks())
+    snap_bytes = open("tasks.snap", "rb").read()
+    tasks, _ = save_tasks(make_tasks()[:2])
+    with open("tasks.snap", "wb") as f:  # snapshot of the previous save
+        f.write(snap_bytes)
+    assert load_snapshot() is None
+    assert LocalScheduler().timer_payload(14) == _build_tasks_for_js(tasks, 14)
+
+def test_truncated_snapshot_ignored(snapshot_on):
+    save_tasks(make_tasks())
+    with open("tasks.snap", "r+b") as f:
+        f.truncate(SNAPSHOT_HEADER.size + 10)
+    assert load_snapshot() is None
+
+def test_foreign_file_ignored(snapshot_on):
+    save_tasks(make_tasks())
+    with open("tasks.snap", "wb") as f:
+        f.write(b"not a snapshot" * 10)
+    assert load_snapshot() is None
+
+def test_corrupt_record_falls_back_to_json(snapshot_on):
+    tasks, _ = save_tasks(make_tasks())
+    with open("tasks.snap", "r+b") as f:  # first record's date -> ordinal 2**31 - 1
+        f.seek(SNAPSHOT_HEADER.size)
+        f.write(struct.pack("<i", 2**31 - 1))
+    snap = load_snapshot()
+    assert snap is not None
+    with pytest.raises(ValueError):
+        _build_tasks_for_js_from_snapshot(snap, 14)
+    assert LocalScheduler().timer_payload(14) == _build_tasks_for_js(tasks, 14)
@@ -0,0 +1,51 @@
+import os, sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scheduler_core as sc
+from scheduler_core import LocalScheduler, build_warm_index, data_signature, gen_id, load_tasks, save_tasks
+
+TODAY = date.today()
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sc, "SNAPSHOT_FILE", None)
+    tasks = [{"id": gen_id(), "mapel": f"Mapel {k}", "jenis": "Tugas", "date": (TODAY + timedelta(days=k)).isoformat(),
+              "start": "19:00", "end": "20:00", "duration_minutes": 60, "user_nim": None} for k in range(3)]
+    save_tasks(tasks)
+    return tasks
+
+def warm():
+    return build_warm_index(load_tasks(), data_signature())
+
+def ids(payload):
+    return sorted(p["id"] for p in payload)
+
+def test_warm_reads_match_slow_path(store):
+    sched = LocalScheduler(warm())
+    assert sched.tasks() == LocalScheduler().tasks()
+    assert sched.timer_payload(14) == LocalScheduler().timer_payload(14)
+
+def test_delete_invalidates_warm_payload(store):
+    sched = LocalScheduler(warm())
+    assert sched.delete_task(store[0]["id"]) == 1
+    assert ids(sched.timer_payload(14)) == ids(LocalScheduler().timer_payload(14)) == sorted(t["id"] for t in store[1:])
+    assert [t["id"] for t in sched.tasks()] == [t["id"] for t in store[1:]]
+
+def test_schedule_batch_invalidates_warm_payload(store):
+    sched = LocalScheduler(warm())
+    item = {"id": gen_id(), "mapel": "Baru", "jenis": "Tugas", "requested_date": TODAY.isoformat(), "duration_minutes": 30}
+    [[new]] = sched.schedule_batch([item])
+    assert new["id"] in ids(sched.timer_payload(14))
+    assert ids(sched.timer_payload(14)) == ids(LocalScheduler().timer_payload(14))
+
+def test_reassign_invalidates_warm_payload(store):
+    sched = LocalScheduler(warm())
+    updated = sched.reassign_task(store[0]["id"], TODAY + timedelta(days=5))
+    assert updated["date"] == (TODAY + timedelta(days=5)).isoformat()
+    assert sched.timer_payload(14) == LocalScheduler().timer_payload(14)
+    assert next(t for t in sched.tasks() if t["id"] == updated["id"])["date"] == updated["date"]